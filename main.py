@@ -1,29 +1,80 @@
 import asyncio
+import hashlib
+import json
 import os
+import time
+from pathlib import Path
 import yaml
-from src.services.github_api import get_all_traffic_data, get_profile_name
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+try:
+    import uvloop
+except ImportError:  # uvloop does not support Windows
+    uvloop = None
+from src.services.github_api import (
+    create_client, get_all_traffic_data, get_profile_name, load_etag_cache, save_etag_cache
+)
 from src.services.chart_generator import generate_chart
 
 GITHUB_USERNAME = os.getenv("GITHUB_USERNAME")
-traffic_data_lock = asyncio.Lock()
+# Ties the cached profile name to the token's account without storing the token
+TOKEN_FINGERPRINT = hashlib.sha256((os.getenv("GITHUB_TOKEN") or "").encode()).hexdigest()[:16]
+ETAG_CACHE_PATH = ".cache/etag_cache.json"
+PROFILE_NAME_CACHE_PATH = ".cache/profile_name.json"
+PROFILE_NAME_TTL = 7 * 24 * 60 * 60  # Seconds before the cached profile name is fetched again
 
 def load_config():
     with open("config.yml", "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
+
+def save_chart(chart_svg):
+    Path("generated").mkdir(exist_ok=True)
+    Path("generated/traffic_chart.svg").write_bytes(chart_svg.encode("utf-8"))
+
+def load_cached_profile_name(login, token_fingerprint):
+    try:
+        if time.time() - os.path.getmtime(PROFILE_NAME_CACHE_PATH) >= PROFILE_NAME_TTL:
+            return None
+        with open(PROFILE_NAME_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Ignore a name cached for another username or token
+    if (isinstance(cached, dict) and cached.get("login") == login
+            and cached.get("token") == token_fingerprint):
+        return cached.get("name")
+    return None
+
+def save_profile_name(login, token_fingerprint, profile_name):
+    os.makedirs(os.path.dirname(PROFILE_NAME_CACHE_PATH), exist_ok=True)
+    with open(PROFILE_NAME_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"login": login, "token": token_fingerprint, "name": profile_name}, f)
+
+async def get_cached_profile_name(client):
+    profile_name = await asyncio.to_thread(load_cached_profile_name, GITHUB_USERNAME, TOKEN_FINGERPRINT)
+    if profile_name is None:
+        profile_name = await get_profile_name(client)
+        if profile_name is not None:
+            await asyncio.to_thread(save_profile_name, GITHUB_USERNAME, TOKEN_FINGERPRINT, profile_name)
+    return profile_name
 
 async def generate_new_data():
     print("Fetching GitHub traffic data...")
 
-    async with traffic_data_lock:
+    async with create_client() as client:
+        await asyncio.to_thread(load_etag_cache, ETAG_CACHE_PATH)
         traffic_results, profile_name = await asyncio.gather(
-            get_all_traffic_data(GITHUB_USERNAME),
-            get_profile_name()
+            get_all_traffic_data(GITHUB_USERNAME, client),
+            get_cached_profile_name(client)
         )
+        await asyncio.to_thread(save_etag_cache, ETAG_CACHE_PATH)
         return traffic_results, profile_name
 
 async def main():
     try:
-        config = load_config()
+        config = await asyncio.to_thread(load_config)
         traffic_results, profile_name = await generate_new_data()
 
         chart_params = {
@@ -33,11 +84,9 @@ async def main():
         }
 
         print("Generating chart...")
-        chart_svg = generate_chart(**chart_params)
+        chart_svg = await asyncio.to_thread(generate_chart, **chart_params)
 
-        os.makedirs("generated", exist_ok=True)
-        with open("generated/traffic_chart.svg", "w", encoding="utf-8") as f:
-            f.write(chart_svg)
+        await asyncio.to_thread(save_chart, chart_svg)
         print(f"SVG saved finished!")
 
     except Exception as e:
@@ -45,4 +94,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
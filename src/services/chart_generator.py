@@ -1,12 +1,30 @@
 import math
 import os
 import json
+from collections import Counter
+from functools import lru_cache
 from typing import Dict
-import svgwrite
-from svgpathtools import parse_path
+from xml.sax.saxutils import escape, quoteattr
+
+THEMES_DIR = os.path.join(os.path.dirname(__file__), "..", "themes")
+
+# Opacity of each two-digit lowercase hex alpha value, "00" to "ff"
+HEX_OPACITY = {f"{i:02x}": i / 255 for i in range(256)}
+
+# Nodes and weights of the 5-point Gauss-Legendre quadrature on [-1, 1]
+GAUSS_LEGENDRE_5 = (
+    (-0.9061798459386640, 0.2369268850561891),
+    (-0.5384693101056831, 0.4786286704993665),
+    (0.0, 0.5688888888888889),
+    (0.5384693101056831, 0.4786286704993665),
+    (0.9061798459386640, 0.2369268850561891),
+)
+# Sub-intervals integrated per curve, keeps the error of steep curves well below a pixel
+BEZIER_LENGTH_INTERVALS = 8
 
 # Load the theme from a JSON file.
 # If the theme file does not exist, raises a FileNotFoundError.
+@lru_cache(maxsize=32)
 def load_theme(theme_name: str) -> Dict:
     """
     Loads the theme from a JSON file located in the 'themes' directory.
@@ -15,19 +33,21 @@ def load_theme(theme_name: str) -> Dict:
         - theme_name: The name of the theme to load.
 
     Returns:
-        A dictionary containing the theme's settings.
+        A dictionary containing the theme's settings. The result is cached
+        per theme name and must not be mutated.
     
     Raises:
         FileNotFoundError: If the specified theme file is not found.
     """
     # Get the theme file path
-    theme_path = os.path.join(os.path.dirname(__file__), "..", "themes", f"{theme_name}.json")
+    theme_path = os.path.join(THEMES_DIR, f"{theme_name}.json")
+    # Open the theme file and return its JSON content.
     # If the theme file does not exist, raise a FileNotFoundError
-    if not os.path.exists(theme_path):
-        raise FileNotFoundError(f"Theme '{theme_name}' not found.")
-    # Open the theme file and return its JSON content
-    with open(theme_path, "r") as theme_file:
-        return json.load(theme_file)
+    try:
+        with open(theme_path, "r") as theme_file:
+            return json.load(theme_file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Theme '{theme_name}' not found.") from None
 
 def calculate_y_ticks(max_value: float, target_ticks: int) -> tuple[float, list[float]]:
     """Calculate appropriate y-axis ticks
@@ -59,20 +79,99 @@ def calculate_y_ticks(max_value: float, target_ticks: int) -> tuple[float, list[
     ticks = [i * unit for i in range(n + 1)]
     return nice_max, ticks
 
+def split_color(color: str) -> tuple[str, float]:
+    """Split a hex color into its RGB part and its opacity
+
+    Args:
+        color: A "#RRGGBB" or "#RRGGBBAA" hex color
+
+    Returns:
+        tuple(rgb, opacity): The "#RRGGBB" color and its opacity between 0 and 1
+    """
+    if len(color) == 9:
+        return color[:7], HEX_OPACITY[color[7:].lower()]
+    return color, 1
+
+def svg_element(tag: str, content: str = None, **attributes) -> str:
+    """Build the markup of a single SVG element
+
+    Underscores in attribute names become hyphens (stroke_width -> stroke-width)
+    and a trailing underscore is dropped (from_ -> from).
+
+    Args:
+        tag: The element name
+        content: The already escaped inner markup, or None for an empty element
+        attributes: The attributes of the element
+
+    Returns:
+        The element as a string
+    """
+    attrs = "".join(
+        f" {name.rstrip('_').replace('_', '-')}={quoteattr(str(value))}"
+        for name, value in attributes.items()
+    )
+    if content is None:
+        return f"<{tag}{attrs} />"
+    return f"<{tag}{attrs}>{content}</{tag}>"
+
 # Creating Smooth Curve Functions
-def create_smooth_path(data_points):
-    if not data_points:
-        return ""
-    
-    path = f"M {data_points[0][0]},{data_points[0][1]}"
+def smooth_path_segments(data_points):
+    """Yield the cubic Bézier segments joining consecutive data points
+
+    Args:
+        data_points: The (x, y) points of the line
+
+    Returns:
+        An iterator of (p0, p1, p2, p3) control point tuples
+    """
     for i in range(1, len(data_points)):
         x0, y0 = data_points[i-1]
         x1, y1 = data_points[i]
         cp1x = x0 + (x1 - x0) / 3
         cp2x = x1 - (x1 - x0) / 3
-        path += f" C {cp1x},{y0} {cp2x},{y1} {x1},{y1}"
+        yield (x0, y0), (cp1x, y0), (cp2x, y1), (x1, y1)
+
+def create_smooth_path(data_points):
+    if not data_points:
+        return ""
+    
+    path = f"M {data_points[0][0]},{data_points[0][1]}"
+    for _, (cp1x, cp1y), (cp2x, cp2y), (x1, y1) in smooth_path_segments(data_points):
+        path += f" C {cp1x},{cp1y} {cp2x},{cp2y} {x1},{y1}"
     return path
 
+def cubic_bezier_length(p0, p1, p2, p3) -> float:
+    """Calculate the arc length of a cubic Bézier curve
+
+    Integrates |B'(t)| with a composite 5-point Gauss-Legendre quadrature.
+
+    Args:
+        p0, p1, p2, p3: The (x, y) control points of the curve
+
+    Returns:
+        The length of the curve
+    """
+    length = 0
+    for interval in range(BEZIER_LENGTH_INTERVALS):
+        for node, weight in GAUSS_LEGENDRE_5:
+            t = (interval + (node + 1) / 2) / BEZIER_LENGTH_INTERVALS
+            mt = 1 - t
+            dx = 3 * mt * mt * (p1[0] - p0[0]) + 6 * mt * t * (p2[0] - p1[0]) + 3 * t * t * (p3[0] - p2[0])
+            dy = 3 * mt * mt * (p1[1] - p0[1]) + 6 * mt * t * (p2[1] - p1[1]) + 3 * t * t * (p3[1] - p2[1])
+            length += weight * math.hypot(dx, dy)
+    return length / (2 * BEZIER_LENGTH_INTERVALS)
+
+def smooth_path_length(data_points) -> float:
+    """Calculate the length of the path built by create_smooth_path
+
+    Args:
+        data_points: The (x, y) points of the line
+
+    Returns:
+        The total length of the path
+    """
+    return sum(cubic_bezier_length(*segment) for segment in smooth_path_segments(data_points))
+
 
 # Generate a chart based on the provided traffic data and theme.
 # Returns the chart as an SVG file response.
@@ -102,36 +201,28 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
     """
     print(f"Generating chart for profile '{profile_name}' with theme '{theme}'")
     # Handling of excluded repos
-    
+    exclude_repos = frozenset(exclude_repos or ())
+
     # Handling Traffic Data
-    traffic_data = {}
+    clones_per_date = Counter()
+    views_per_date = Counter()
     for traffic in traffic_results:
-        repo_name = list(traffic.keys())[0]
-        if repo_name not in exclude_repos:
-            traffic_values = list(traffic.values())[0]
-            
-            # Handling clones data
-            for date in traffic_values["clones"]:
-                date_str = date["timestamp"].split("T")[0]
-                if date_str not in traffic_data:
-                    traffic_data[date_str] = {"clones": 0, "views": 0}
-                traffic_data[date_str]["clones"] += date["count"]
-            
-            # Handling views data
-            for date in traffic_values["views"]:
-                date_str = date["timestamp"].split("T")[0]
-                if date_str not in traffic_data:
-                    traffic_data[date_str] = {"clones": 0, "views": 0}
-                traffic_data[date_str]["views"] += date["count"]
+        (repo_name, traffic_values), = traffic.items()
+        if repo_name in exclude_repos:
+            continue
+
+        # Handling clones and views data
+        clones_per_date.update({date["timestamp"][:10]: date["count"] for date in traffic_values["clones"]})
+        views_per_date.update({date["timestamp"][:10]: date["count"] for date in traffic_values["views"]})
     
     # load theme
     theme = load_theme(theme)
     
     # prepare data
-    sorted_dates = sorted(traffic_data.keys())
-    dates = [date.split('-')[-1] for date in sorted_dates]
-    clones = [traffic_data[date]["clones"] for date in sorted_dates]
-    views = [traffic_data[date]["views"] for date in sorted_dates]
+    sorted_dates = sorted(clones_per_date.keys() | views_per_date.keys())
+    dates = [date[8:10] for date in sorted_dates]
+    clones = [clones_per_date[date] for date in sorted_dates]
+    views = [views_per_date[date] for date in sorted_dates]
     
     # Setting Margins and Drawing Area
     margin = {'top': 60, 'right': 50, 'bottom': 80, 'left': 60}
@@ -148,51 +239,32 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
     grid_color = theme["grid_color"]
 
     # If there is transparency, switch the color
-    background_color_opacity = 1
-    clones_color_opacity = 1
-    views_color_opacity = 1
-    clones_point_color_opacity = 1
-    views_point_color_opacity = 1
-    text_color_opacity = 1
-    grid_color_opacity = 1
-
-    if len(background_color) == 9:
-        background_color, opacity = background_color[:7], background_color[7:]
-        background_color_opacity = int(opacity, 16) / 255
-    if len(clones_color) == 9:
-        clones_color, opacity = clones_color[:7], clones_color[7:]
-        clones_color_opacity = int(opacity, 16) / 255
-    if len(views_color) == 9:
-        views_color, opacity = views_color[:7], views_color[7:]
-        views_color_opacity = int(opacity, 16) / 255
-    if len(clones_point_color) == 9:
-        clones_point_color, opacity = clones_point_color[:7], clones_point_color[7:]
-        clones_point_color_opacity = int(opacity, 16) / 255
-    if len(views_point_color) == 9:
-        views_point_color, opacity = views_point_color[:7], views_point_color[7:]
-        views_point_color_opacity = int(opacity, 16) / 255
-    if len(text_color) == 9:
-        text_color, opacity = text_color[:7], text_color[7:]
-        text_color_opacity = int(opacity, 16) / 255
-    if len(grid_color) == 9:
-        grid_color, opacity = grid_color[:7], grid_color[7:]
-        grid_color_opacity = int(opacity, 16) / 255
+    background_color, background_color_opacity = split_color(background_color)
+    clones_color, clones_color_opacity = split_color(clones_color)
+    views_color, views_color_opacity = split_color(views_color)
+    clones_point_color, clones_point_color_opacity = split_color(clones_point_color)
+    views_point_color, views_point_color_opacity = split_color(views_point_color)
+    text_color, text_color_opacity = split_color(text_color)
+    grid_color, grid_color_opacity = split_color(grid_color)
     
     # create SVG
-    dwg = svgwrite.Drawing(size=(width, height))
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="{width}" height="{height}">']
     
     # add background
-    dwg.add(dwg.rect(insert=(0, 0), size=(width, height), rx=radius, ry=radius, fill=background_color, fill_opacity=background_color_opacity))
+    parts.append(svg_element("rect", x=0, y=0, width=width, height=height, rx=radius, ry=radius, fill=background_color, fill_opacity=background_color_opacity))
     
     # Calculation ratio
     max_value = max(max(clones), max(views)) if clones and views else 0
     y_scale = plot_height / (max_value if max_value > 0 else 1)
     x_step = plot_width / (len(dates) - 1) if len(dates) > 1 else plot_width
+    x_positions = [margin['left'] + i * x_step for i in range(len(dates))]
     
     # add Title
-    dwg.add(dwg.text(
-        f"{profile_name}'s Repo Traffic Stats",
-        insert=(width/2, margin['top']/2),
+    parts.append(svg_element(
+        "text",
+        escape(f"{profile_name}'s Repo Traffic Stats"),
+        x=width/2,
+        y=margin['top']/2,
         text_anchor="middle",
         fill=text_color,
         fill_opacity=text_color_opacity,
@@ -200,15 +272,21 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
     ))
     
     # add axes
-    dwg.add(dwg.line(
-        start=(margin['left'], height-margin['bottom']),
-        end=(width-margin['right'], height-margin['bottom']),
+    parts.append(svg_element(
+        "line",
+        x1=margin['left'],
+        y1=height-margin['bottom'],
+        x2=width-margin['right'],
+        y2=height-margin['bottom'],
         stroke=grid_color,
         stroke_opacity=grid_color_opacity
     ))
-    dwg.add(dwg.line(
-        start=(margin['left'], margin['top']),
-        end=(margin['left'], height-margin['bottom']),
+    parts.append(svg_element(
+        "line",
+        x1=margin['left'],
+        y1=margin['top'],
+        x2=margin['left'],
+        y2=height-margin['bottom'],
         stroke=grid_color,
         stroke_opacity=grid_color_opacity
     ))
@@ -221,9 +299,12 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
         y_pos = height - margin['bottom'] - y_value * y_scale
         
         # add horizontal grid lines
-        dwg.add(dwg.line(
-            start=(margin['left'], y_pos),
-            end=(width - margin['right'], y_pos),
+        parts.append(svg_element(
+            "line",
+            x1=margin['left'],
+            y1=y_pos,
+            x2=width - margin['right'],
+            y2=y_pos,
             stroke=grid_color,
             stroke_opacity=grid_color_opacity,
             stroke_width=1,
@@ -232,43 +313,69 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
         ))
         
         # add y-axis scales
-        dwg.add(dwg.text(
+        parts.append(svg_element(
+            "text",
             str(int(y_value)),
-            insert=(margin['left'] - 10, y_pos + 5),
+            x=margin['left'] - 10,
+            y=y_pos + 5,
             text_anchor="end",
             fill=text_color,
             fill_opacity=text_color_opacity,
             style="font-size: 12px; font-family: Arial"
         ))
     
-    # Adding Vertical Gridlines
-    for i, date in enumerate(dates):
-        x = margin['left'] + i * x_step
-        
+    # Adding Vertical Gridlines and x-axis tags
+    label_y = height - margin['bottom'] + 20
+    for x, date in zip(x_positions, dates):
         # add vertical grid lines
-        dwg.add(dwg.line(
-            start=(x, margin['top']),
-            end=(x, height - margin['bottom']),
+        parts.append(svg_element(
+            "line",
+            x1=x,
+            y1=margin['top'],
+            x2=x,
+            y2=height - margin['bottom'],
             stroke=grid_color,
             stroke_opacity=grid_color_opacity,
             stroke_width=1,
             stroke_dasharray="5,5",
             opacity=0.5
         ))
+
+        # add x-axis tag
+        parts.append(svg_element(
+            "text",
+            date,
+            x=x,
+            y=label_y,
+            transform=f"rotate(45, {x}, {label_y})",
+            fill=text_color,
+            fill_opacity=text_color_opacity,
+            style="font-size: 12px; font-family: Arial"
+        ))
     
     # Drawing data lines
+    baseline = height - margin['bottom']
     for dataset, line_color, line_opacity, point_color, point_opacity in [
         (clones, clones_color, clones_color_opacity, clones_point_color, clones_point_color_opacity),
         (views, views_color, views_color_opacity, views_point_color, views_point_color_opacity)]:
-        points = [(margin['left'] + i * x_step, 
-                  height - margin['bottom'] - value * y_scale)
-                 for i, value in enumerate(dataset)]
+        points = [(x, baseline - value * y_scale) for x, value in zip(x_positions, dataset)]
         
         path_data = create_smooth_path(points)
-        path = parse_path(path_data)
-        path_length = path.length()
+        path_length = smooth_path_length(points)
 
-        path_element = dwg.path(
+        path_animation = svg_element(
+            "animate",
+            attributeName="stroke-dashoffset",
+            from_=str(path_length),
+            to_="0",
+            dur="2s",
+            repeatCount="1",
+            fill="freeze"
+        )
+
+        path_element = svg_element(
+            "path",
+            path_animation,
             d=path_data,
             stroke=line_color,
             stroke_opacity=line_opacity,
@@ -280,50 +387,35 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
             stroke_dashoffset=str(path_length)
         )
 
-        path_element.add(dwg.animate(
-            attributeName="stroke-dashoffset",
-            from_=str(path_length),
-            to_="0",
-            dur="2s",
-            repeatCount="1",
-            fill="freeze" 
-        ))
-
         for point in points:
             x, y = point
-            dwg.add(dwg.circle(
-                center=(x, y),
+            parts.append(svg_element(
+                "circle",
+                cx=x,
+                cy=y,
                 r=4,
                 fill=point_color,
                 fill_opacity=point_opacity
             ))
         
-        dwg.add(path_element)
-    
-    # add x-axis tag
-    for i, date in enumerate(dates):
-        x = margin['left'] + i * x_step
-        dwg.add(dwg.text(
-            date,
-            insert=(x, height-margin['bottom']+20),
-            transform=f"rotate(45, {x}, {height-margin['bottom']+20})",
-            fill=text_color,
-            fill_opacity=text_color_opacity,
-            style="font-size: 12px; font-family: Arial"
-        ))
+        parts.append(path_element)
     
     # add x-axis title
-    dwg.add(dwg.text(
+    parts.append(svg_element(
+        "text",
         "Days",
-        insert=(width/2, height-margin['bottom']/3),
+        x=width/2,
+        y=height-margin['bottom']/3,
         text_anchor="middle",
         fill=text_color,
         fill_opacity=text_color_opacity,
         style="font-size: 14px; font-family: Arial"
     ))
-    dwg.add(dwg.text(
+    parts.append(svg_element(
+        "text",
         "Count",
-        insert=(margin['left']/3, height/2),
+        x=margin['left']/3,
+        y=height/2,
         text_anchor="middle",
         transform=f"rotate(-90, {margin['left']/3}, {height/2})",
         fill=text_color,
@@ -335,34 +427,45 @@ def generate_chart(profile_name: str, traffic_results: dict, theme: str, height:
     legend_offset = 15
     legend_y = height - margin['bottom']/3 + legend_offset 
     # Clones legend
-    dwg.add(dwg.line(
-        start=(width/2 - 60, legend_y),
-        end=(width/2 - 40, legend_y),
+    parts.append(svg_element(
+        "line",
+        x1=width/2 - 60,
+        y1=legend_y,
+        x2=width/2 - 40,
+        y2=legend_y,
         stroke=clones_color,
         stroke_opacity=clones_color_opacity,
         stroke_width=3
     ))
-    dwg.add(dwg.text(
+    parts.append(svg_element(
+        "text",
         "Clones",
-        insert=(width/2 - 30, legend_y + 5),
+        x=width/2 - 30,
+        y=legend_y + 5,
         fill=text_color,
         fill_opacity=text_color_opacity,
         style="font-size: 12px; font-family: Arial"
     ))
     # Views legend
-    dwg.add(dwg.line(
-        start=(width/2 + 40, legend_y),
-        end=(width/2 + 60, legend_y),
+    parts.append(svg_element(
+        "line",
+        x1=width/2 + 40,
+        y1=legend_y,
+        x2=width/2 + 60,
+        y2=legend_y,
         stroke=views_color,
         stroke_opacity=views_color_opacity,
         stroke_width=3
     ))
-    dwg.add(dwg.text(
+    parts.append(svg_element(
+        "text",
         "Views",
-        insert=(width/2 + 70, legend_y + 5),
+        x=width/2 + 70,
+        y=legend_y + 5,
         fill=text_color,
         fill_opacity=text_color_opacity,
         style="font-size: 12px; font-family: Arial"
     ))
     
-    return dwg.tostring()
\ No newline at end of file
+    parts.append("</svg>")
+    return "".join(parts)
\ No newline at end of file
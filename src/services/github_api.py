@@ -1,22 +1,124 @@
 import asyncio
+import contextlib
 import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import httpx
+import orjson
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 BASE_URL = "https://api.github.com"
+GRAPHQL_URL = f"{BASE_URL}/graphql"
+USER_URL = f"{BASE_URL}/user"
+CLONES_URL = BASE_URL + "/repos/{owner}/{repo}/traffic/clones"
+VIEWS_URL = BASE_URL + "/repos/{owner}/{repo}/traffic/views"
 HEADERS = {
     "Authorization": f"Bearer {GITHUB_TOKEN}",
     "Accept": "application/vnd.github+json",
     "X-GitHub-Api-Version": "2022-11-28",
 }
+try:
+    # Traffic requests in flight at the same time
+    GITHUB_MAX_CONCURRENT = max(1, int(os.getenv("GITHUB_MAX_CONCURRENT") or "20"))
+except ValueError:
+    raise ValueError(f"GITHUB_MAX_CONCURRENT must be an integer, got {os.getenv('GITHUB_MAX_CONCURRENT')!r}") from None
+MAX_RETRIES = 6  # Retries of a rate-limited request
+SECONDARY_RATE_LIMIT_BACKOFF = 60  # Seconds before retrying a secondary rate limit, doubled on each retry
+MAX_RATE_LIMIT_WAIT = 15 * 60  # Total seconds a request may spend waiting on rate limits
+
+# Lists the names of the public repositories owned by a user or organization, 100 per page
+USER_REPOS_QUERY = """
+query($login: String!, $cursor: String) {
+  repositoryOwner(login: $login) {
+    repositories(first: 100, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER) {
+      nodes { name }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
+
+# ETag and parsed payload of previous responses, keyed by URL
+etag_cache = {}
+# URLs requested in this run, the only ones save_etag_cache writes out
+requested_urls = set()
+
+# Load the ETag cache saved by a previous run
+def load_etag_cache(path: str):
+    """
+    Loads ETags and payloads saved by save_etag_cache into etag_cache.
+    A missing or unreadable file leaves the cache empty.
+
+    Args:
+        - path: The path of the cache file.
+    """
+    try:
+        with open(path, "rb") as cache_file:
+            etag_cache.update(orjson.loads(cache_file.read()))
+    except (OSError, orjson.JSONDecodeError):
+        pass
+
+# Save the ETag cache for the next run
+def save_etag_cache(path: str):
+    """
+    Saves etag_cache to a JSON file so the next run can send conditional requests.
+    Only URLs requested in this run are kept, so entries of deleted or renamed
+    repositories are dropped. Payloads are reduced to what the chart reads,
+    see strip_traffic_payload.
+
+    Args:
+        - path: The path of the cache file.
+    """
+    persisted = {
+        url: (etag_cache[url][0], strip_traffic_payload(etag_cache[url][1]))
+        for url in requested_urls
+        if url in etag_cache
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as cache_file:
+        cache_file.write(orjson.dumps(persisted))
+
+# Keep only the daily totals of a traffic payload
+def strip_traffic_payload(data: dict):
+    """
+    Drops everything but the timestamp and count of each daily entry, so the
+    unique visitor counts and repository totals, which GitHub only shows to
+    users with push access, are not written to the cache.
+
+    Args:
+        - data: The parsed payload of a clones or views traffic response.
+
+    Returns:
+        A dictionary with the same "clones" and "views" lists, each entry
+        holding only its timestamp and count.
+    """
+    return {
+        key: [{"timestamp": entry["timestamp"], "count": entry["count"]} for entry in data[key]]
+        for key in ("clones", "views")
+        if key in data
+    }
+
+# Create the HTTP client shared by all GitHub requests of a run
+def create_client() -> httpx.AsyncClient:
+    """
+    Creates an HTTP/2 client whose connection pool can keep every concurrent
+    request alive. Use it as an async context manager so it gets closed.
+
+    Returns:
+        A new httpx.AsyncClient.
+    """
+    limits = httpx.Limits(max_keepalive_connections=GITHUB_MAX_CONCURRENT)
+    return httpx.AsyncClient(http2=True, limits=limits)
 
 # Fetch all traffic data for a user's repositories
-async def get_all_traffic_data(username: str):
+async def get_all_traffic_data(username: str, client: httpx.AsyncClient = None):
     """
     Retrieves traffic data (clones and views) for all repositories of a GitHub user.
 
     Args:
         - username: The GitHub username whose repository traffic data is to be fetched.
+        - client: (Optional) The HTTP client to reuse. A new one is opened if omitted.
 
     Returns:
        A dictionary containing traffic data for each day, including the number of clones and views.
@@ -24,33 +126,39 @@ async def get_all_traffic_data(username: str):
     Raises:
         HTTPException: If any error occurs while fetching the data.
     """
-    repos = await get_user_repos(username)
+    if client is None:
+        async with create_client() as client:
+            return await get_all_traffic_data(username, client)
 
-    async with httpx.AsyncClient(http2=True) as client:
-        semaphore = asyncio.Semaphore(10)
+    repos = await get_user_repos(username, client)
 
-        async def bounded_task(repo_name):
-            async with semaphore:
-                return await get_repo_traffic(username, repo_name, client)
+    # Bound individual requests rather than repositories, so clones and views
+    # of all repositories share one flat pool of in-flight requests
+    semaphore = asyncio.Semaphore(GITHUB_MAX_CONCURRENT)
 
-        tasks = [bounded_task(repo) for repo in repos]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def fetch_repo_traffic(repo_name):
+        return repo_name, await get_repo_traffic(username, repo_name, client, semaphore)
 
-    valid_results = [
-        {repo: result} 
-        for repo, result in zip(repos, results) 
-        if not isinstance(result, Exception)
-    ]
+    # Repositories whose traffic cannot be read (e.g. no push access) are skipped
+    valid_results = []
+    for task in asyncio.as_completed([fetch_repo_traffic(repo) for repo in repos]):
+        try:
+            repo_name, result = await task
+        except Exception as e:
+            print(f"Skipping repository traffic: {e}")
+            continue
+        valid_results.append({repo_name: result})
 
     return valid_results
 
 # Fetch all repositories of a user
-async def get_user_repos(username: str):
+async def get_user_repos(username: str, client: httpx.AsyncClient = None):
     """
     Retrieves all public repository names for a specified GitHub user.
 
     Args:
-        username: The GitHub username whose repositories are to be fetched.
+        - username: The GitHub username whose repositories are to be fetched.
+        - client: (Optional) The HTTP client to reuse. A new one is opened if omitted.
 
     Returns:
         A list of repository names owned by the user.
@@ -58,48 +166,57 @@ async def get_user_repos(username: str):
     Raises:
         dict: A dictionary containing error message if any error occurs while fetching the repositories.
     """
-    url = f"{BASE_URL}/users/{username}/repos"
+    if client is None:
+        async with create_client() as client:
+            return await get_user_repos(username, client)
+
     repos = []
-    page = 1
+    cursor = None
+
+    while True:
+        try:
+            response = await send_request(
+                client, "POST", GRAPHQL_URL,
+                headers=HEADERS,
+                json={"query": USER_REPOS_QUERY, "variables": {"login": username, "cursor": cursor}}
+            )
+            response.raise_for_status()  # Raises HTTPStatusError for 4xx/5xx responses
 
-    async with httpx.AsyncClient(http2=True) as client:
-        while True:
-            try:
-                response = await client.get(
-                    url,
-                    headers=HEADERS,
-                    params={"page": page, "per_page": 100, "type": "public"}
-                )
-                response.raise_for_status()  # Raises HTTPStatusError for 4xx/5xx responses
+            response_json = orjson.loads(response.content)
+            if response_json.get("errors"):
+                raise Exception(f"GraphQL error: {response_json['errors'][0]['message']}")
 
-                current_repos = response.json()
-                if not current_repos:
-                    break
+            owner = response_json["data"]["repositoryOwner"]
+            if owner is None:
+                raise Exception(f"GitHub account not found: {username}")
 
-                repos.extend([repo["name"] for repo in current_repos])
+            repositories = owner["repositories"]
+            repos.extend([repo["name"] for repo in repositories["nodes"]])
 
-                if "next" not in response.links:
-                    break
+            if not repositories["pageInfo"]["hasNextPage"]:
+                break
 
-                page += 1
+            cursor = repositories["pageInfo"]["endCursor"]
 
-            except httpx.HTTPStatusError as http_err:
-                raise Exception(f"HTTP error: {http_err.response.status_code} - {http_err.response.text}")
-            except httpx.RequestError as e:
-                raise Exception(f"Network error: {str(e)}")
-            except Exception as e:
-                raise Exception(f"Unexpected error: {str(e)}")
+        except httpx.HTTPStatusError as http_err:
+            raise Exception(f"HTTP error: {http_err.response.status_code} - {http_err.response.text}")
+        except httpx.RequestError as e:
+            raise Exception(f"Network error: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Unexpected error: {str(e)}")
 
     return repos
 
 # Fetch traffic data for a specific repository
-async def get_repo_traffic(repo_owner, repo_name, client: httpx.AsyncClient):
+async def get_repo_traffic(repo_owner, repo_name, client: httpx.AsyncClient, semaphore: asyncio.Semaphore = None):
     """
     Retrieves traffic data (clones and views) for a specific repository.
 
     Args:
         - repo_owner: The owner of the repository.
         - repo_name: The name of the repository.
+        - client: The HTTP client used to send the requests.
+        - semaphore: (Optional) A semaphore held for the duration of each request.
 
     Returns:
         A dictionary containing clones and views data for the repository.
@@ -107,50 +224,176 @@ async def get_repo_traffic(repo_owner, repo_name, client: httpx.AsyncClient):
     Raises:
         Exception: If any error occurs while fetching the traffic data.
     """
-    clones_url = f"{BASE_URL}/repos/{repo_owner}/{repo_name}/traffic/clones"
-    views_url = f"{BASE_URL}/repos/{repo_owner}/{repo_name}/traffic/views"
+    clones_url = CLONES_URL.format(owner=repo_owner, repo=repo_name)
+    views_url = VIEWS_URL.format(owner=repo_owner, repo=repo_name)
+    semaphore = semaphore or contextlib.nullcontext()
+
+    async def bounded_fetch(url):
+        async with semaphore:
+            return await get_json_with_etag(url, client)
 
     try:
-        clones_res, views_res = await asyncio.gather(
-            client.get(clones_url, headers=HEADERS),
-            client.get(views_url, headers=HEADERS)
+        clones_json, views_json = await asyncio.gather(
+            bounded_fetch(clones_url),
+            bounded_fetch(views_url)
         )
-        clones_res.raise_for_status()
-        views_res.raise_for_status()
 
     except httpx.HTTPStatusError as e:
         raise Exception(f"Error for {repo_name}: HTTP {e.response.status_code} - {e.response.text}")
+    except ValueError as e:
+        raise Exception(f"JSON decode error for {repo_name}: {str(e)}")
     except Exception as e:
         raise Exception(f"Unexpected error for {repo_name}: {str(e)}")
 
-    try:
-        clones_data = clones_res.json().get("clones", [])
-        views_data = views_res.json().get("views", [])
-    except ValueError as e:
-        raise Exception(f"JSON decode error for {repo_name}: {str(e)}")
+    clones_data = clones_json.get("clones", [])
+    views_data = views_json.get("views", [])
 
     return {"clones": clones_data, "views": views_data}
 
+# Send a request, waiting and retrying while GitHub rate limits it
+async def send_request(client: httpx.AsyncClient, method: str, url: str, **kwargs):
+    """
+    Sends a request and retries it when GitHub answers with a rate-limit error.
+    The wait honors the Retry-After and X-RateLimit-Reset headers, falling back
+    to exponential backoff when neither is present. Gives up once the total
+    wait would exceed MAX_RATE_LIMIT_WAIT.
+
+    Args:
+        - client: The HTTP client used to send the request.
+        - method: The HTTP method of the request.
+        - url: The URL of the request.
+        - kwargs: Extra arguments passed to httpx.AsyncClient.request.
+
+    Returns:
+        The last response received, which may still be an error response.
+    """
+    waited = 0
+    for attempt in range(MAX_RETRIES + 1):
+        response = await client.request(method, url, **kwargs)
+        if response.status_code not in (403, 429) or attempt == MAX_RETRIES:
+            return response
+
+        delay = get_rate_limit_delay(response, attempt)
+        if delay is None:
+            # A 403 that is not a rate limit means missing permissions, retrying will not help
+            return response
+
+        delay = max(delay, 0)
+        if waited + delay > MAX_RATE_LIMIT_WAIT:
+            return response
+        waited += delay
+        await asyncio.sleep(delay)
+
+# Work out how long to wait before retrying a rate-limited response
+def get_rate_limit_delay(response: httpx.Response, attempt: int):
+    """
+    Computes the wait before retrying a 403 or 429 response. Retry-After wins,
+    then X-RateLimit-Reset when the primary limit is exhausted. Secondary rate
+    limits without either header back off exponentially from one minute.
+
+    Args:
+        - response: The 403 or 429 response.
+        - attempt: The number of retries already made for the request.
+
+    Returns:
+        The delay in seconds, or None if the response is not a rate-limit error.
+    """
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is not None:
+        return retry_after
+
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return int(response.headers["X-RateLimit-Reset"]) - time.time()
+        except (KeyError, ValueError):
+            pass
+
+    if response.status_code == 429 or "rate limit" in response.text.lower():
+        return SECONDARY_RATE_LIMIT_BACKOFF * 2 ** attempt
+
+    return None
+
+# Parse a Retry-After header value
+def parse_retry_after(value: str):
+    """
+    Parses a Retry-After header given either as seconds or as an HTTP date.
+
+    Args:
+        - value: The header value, or None if the header is absent.
+
+    Returns:
+        The delay in seconds, or None if the value is absent or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return (retry_at - datetime.now(timezone.utc)).total_seconds()
+
+# Fetch a JSON resource, reusing the cached payload when it has not changed
+async def get_json_with_etag(url: str, client: httpx.AsyncClient):
+    """
+    Sends a conditional GET request using the ETag of the previous response.
+    A 304 Not Modified answer does not count against the primary rate limit.
+
+    Args:
+        - url: The URL of the resource to fetch.
+        - client: The HTTP client used to send the request.
+
+    Returns:
+        The parsed JSON payload of the resource.
+
+    Raises:
+        httpx.HTTPStatusError: If the response has an error status code.
+    """
+    requested_urls.add(url)
+    cached = etag_cache.get(url)
+    headers = {**HEADERS, "If-None-Match": cached[0]} if cached else HEADERS
+
+    response = await send_request(client, "GET", url, headers=headers)
+    if cached and response.status_code == 304:
+        return cached[1]
+    response.raise_for_status()
+
+    data = orjson.loads(response.content)
+    etag = response.headers.get("ETag")
+    if etag:
+        etag_cache[url] = (etag, data)
+
+    return data
+
 # Fetch the profile name of the authenticated GitHub user
-async def get_profile_name():
+async def get_profile_name(client: httpx.AsyncClient = None):
     """
     Retrieves the name of the authenticated GitHub user.
 
+    Args:
+        - client: (Optional) The HTTP client to reuse. A new one is opened if omitted.
+
     Returns:
         The name of the authenticated GitHub user.
 
     Raises:
         HTTPException: If any error occurs while fetching the profile name.
     """
-    url = f"{BASE_URL}/user"
-    
+    if client is None:
+        async with create_client() as client:
+            return await get_profile_name(client)
+
     try:
-        async with httpx.AsyncClient(http2=True) as client:
-            response = await client.get(url, headers=HEADERS)
+        response = await send_request(client, "GET", USER_URL, headers=HEADERS)
         
         response.raise_for_status()
         
-        response_json = response.json()
+        response_json = orjson.loads(response.content)
     
     except httpx.HTTPStatusError as http_err:
         raise Exception(f"HTTP error: {http_err.response.status_code} - {http_err.response.text}")